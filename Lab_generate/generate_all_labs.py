@@ -5,12 +5,19 @@ This script generates personalized coding labs for all 272 concepts
 from the knowledge graph export file.
 """
 
-import json
+from __future__ import annotations
+
 import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, NamedTuple, Tuple
 import sys
 
+if TYPE_CHECKING:
+    from typing import List, Union
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -21,137 +28,239 @@ from models.lab_models import (
     LabGenerationMetadata,
     CompleteLabResult
 )
+from models.lab_models_fast import (
+    FastLabExercise,
+    FastLabSection,
+    FastPersonalizedLab,
+    FastLabGenerationMetadata,
+    FastCompleteLabResult
+)
 from utils.file_utils import (
+    ConceptInput,
     load_concepts_from_export,
     organize_lab_output,
-    create_summary_report,
-    sanitize_filename
+    summarize_lab_result,
+    write_lab_line,
+    write_summary_line,
+    create_summary_report_from_jsonl
 )
 
 
+# Keyword -> difficulty. Order matters: the first keyword found wins.
+DIFFICULTY_MAP = {
+    'database': 'medium',
+    'algorithm': 'hard',
+    'system': 'hard',
+    'data': 'easy',
+    'processing': 'medium',
+    'analysis': 'medium',
+    'storage': 'easy',
+    'framework': 'medium',
+    'model': 'hard',
+    'technique': 'medium'
+}
+
+# Base completion time in minutes for a single-section lab
+BASE_TIME = {
+    'easy': 30,
+    'medium': 45,
+    'hard': 60
+}
+
+
+@lru_cache(maxsize=1024)
+def _difficulty_for(concept_name: str, definition: str) -> str:
+    """Determine difficulty based on concept characteristics."""
+    # Check for keywords in a single casefolded haystack; the first keyword
+    # in DIFFICULTY_MAP order wins
+    haystack = f"{concept_name}\n{definition}".casefold()
+    for keyword, difficulty in DIFFICULTY_MAP.items():
+        if keyword in haystack:
+            return difficulty
+    
+    # Default based on definition length
+    if len(definition) > 200:
+        return 'hard'
+    elif len(definition) > 100:
+        return 'medium'
+    else:
+        return 'easy'
+
+
+def _estimated_time(difficulty: str, num_sections: int) -> int:
+    """Estimate lab completion time."""
+    return BASE_TIME.get(difficulty, 45) + (num_sections - 1) * 15
+
+
+class _ExerciseSpec(NamedTuple):
+    """Immutable field values of one template exercise."""
+    
+    type: str
+    hints: int
+    description: str
+    starter_code: str
+    solution: str
+    test_cases: Tuple[Tuple[Tuple[str, str], ...], ...] = ()
+
+
+@lru_cache(maxsize=1024)
+def _exercise_specs(concept_name: str, difficulty: str,
+                    personalization_context: str = None) -> Tuple[_ExerciseSpec, ...]:
+    """
+    Work out the exercises for a concept.
+    
+    Only immutable values are cached; _build_exercises turns them into fresh
+    models for every lab, so callers may modify the labs they get back.
+    """
+    specs = [
+        # Guided exercise
+        _ExerciseSpec(
+            type='guided',
+            hints=3 if difficulty == 'easy' else 2,
+            description=f"Implement a basic example demonstrating {concept_name}",
+            starter_code=f"# TODO: Implement {concept_name}\n# Your code here\n",
+            solution=f"# Solution for {concept_name}\n# Implementation details\n",
+            test_cases=(
+                (("input", "test_input"), ("expected", "expected_output")),
+            )
+        )
+    ]
+    
+    # Challenge exercise for medium/hard
+    if difficulty in ['medium', 'hard']:
+        specs.append(_ExerciseSpec(
+            type='challenge',
+            hints=1,
+            description=f"Apply {concept_name} to solve a real-world problem",
+            starter_code=f"# Challenge: Advanced {concept_name}\n",
+            solution=f"# Advanced solution\n"
+        ))
+    
+    return tuple(specs)
+
+
+def _build_exercises(specs: Tuple[_ExerciseSpec, ...],
+                     fast: bool = False) -> List[Union[LabExercise, FastLabExercise]]:
+    """Build new exercise models from cached specs; dataclasses when fast is True."""
+    make_exercise = FastLabExercise if fast else LabExercise
+    return [
+        make_exercise(**{**spec._asdict(), 'test_cases': [dict(tc) for tc in spec.test_cases]})
+        for spec in specs
+    ]
+
+
+@lru_cache(maxsize=1024)
+def _plan_lab(concept_name: str, definition: str,
+              personalization_context: str = None) -> Tuple[str, str, Tuple[_ExerciseSpec, ...], int]:
+    """
+    Work out everything generate_lab derives from the concept in one step.
+    
+    Returns:
+        Tuple of (title, difficulty, exercise specs, estimated_time)
+    """
+    difficulty = _difficulty_for(concept_name, definition)
+    
+    # Create personalized title
+    if personalization_context:
+        title = f"Hands-On Lab: {concept_name} in {personalization_context.title()}"
+    else:
+        title = f"Hands-On Lab: {concept_name}"
+    
+    specs = _exercise_specs(concept_name, difficulty, personalization_context)
+    
+    return title, difficulty, specs, _estimated_time(difficulty, 1)
+
+
 class TemplateLabGenerator:
     """
     Template-based lab generator that doesn't require LLM API.
     Creates structured labs based on concept information.
     """
     
+    # Boilerplate shared by every lab; copied into lists when a lab is built
+    _LEARNING_OBJECTIVE_TEMPLATES = (
+        "Understand the fundamentals of {c}",
+        "Apply {c} in practical scenarios",
+        "Implement solutions using {c}"
+    )
+    _DEFAULT_PREREQS = ("Basic programming knowledge", "Understanding of databases")
+    _DEFAULT_TECHNOLOGIES = ("Python", "Jupyter Notebook")
+    
     def __init__(self):
-        self.difficulty_map = {
-            'database': 'medium',
-            'algorithm': 'hard',
-            'system': 'hard',
-            'data': 'easy',
-            'processing': 'medium',
-            'analysis': 'medium',
-            'storage': 'easy',
-            'framework': 'medium',
-            'model': 'hard',
-            'technique': 'medium'
-        }
-    
-    def _determine_difficulty(self, concept_name: str, definition: str) -> str:
+        self.difficulty_map = DIFFICULTY_MAP
+    
+    @staticmethod
+    def _determine_difficulty(concept_name: str, definition: str) -> str:
         """Determine difficulty based on concept characteristics."""
-        concept_lower = concept_name.lower()
-        definition_lower = definition.lower()
-        
-        # Check for keywords
-        for keyword, difficulty in self.difficulty_map.items():
-            if keyword in concept_lower or keyword in definition_lower:
-                return difficulty
-        
-        # Default based on definition length
-        if len(definition) > 200:
-            return 'hard'
-        elif len(definition) > 100:
-            return 'medium'
-        else:
-            return 'easy'
+        return _difficulty_for(concept_name, definition)
     
     def _estimate_time(self, difficulty: str, num_sections: int) -> int:
         """Estimate lab completion time."""
-        base_time = {
-            'easy': 30,
-            'medium': 45,
-            'hard': 60
-        }
-        return base_time.get(difficulty, 45) + (num_sections - 1) * 15
+        return _estimated_time(difficulty, num_sections)
     
     def _create_exercises(self, concept_name: str, difficulty: str, 
                          personalization_context: str = None) -> List[LabExercise]:
         """Create exercises for a concept."""
-        exercises = []
-        
-        # Guided exercise
-        exercises.append(LabExercise(
-            type='guided',
-            hints=3 if difficulty == 'easy' else 2,
-            description=f"Implement a basic example demonstrating {concept_name}",
-            starter_code=f"# TODO: Implement {concept_name}\n# Your code here\n",
-            solution=f"# Solution for {concept_name}\n# Implementation details\n",
-            test_cases=[
-                {"input": "test_input", "expected": "expected_output"}
-            ]
-        ))
-        
-        # Challenge exercise for medium/hard
-        if difficulty in ['medium', 'hard']:
-            exercises.append(LabExercise(
-                type='challenge',
-                hints=1,
-                description=f"Apply {concept_name} to solve a real-world problem",
-                starter_code=f"# Challenge: Advanced {concept_name}\n",
-                solution=f"# Advanced solution\n",
-                test_cases=[]
-            ))
-        
-        return exercises
+        return _build_exercises(_exercise_specs(concept_name, difficulty, personalization_context))
     
     def generate_lab(self, concept_name: str, concept_definition: str,
-                    topic: str, personalization_context: str = None) -> CompleteLabResult:
-        """Generate a template-based lab for a concept."""
+                    topic: str, personalization_context: str = None,
+                    validate: bool = True) -> CompleteLabResult:
+        """
+        Generate a template-based lab for a concept.
+        
+        Args:
+            concept_name: Name of the concept
+            concept_definition: Definition of the concept
+            topic: Topic the concept belongs to
+            personalization_context: Optional personalization context
+            validate: Build validated Pydantic models (the default). When False,
+                return the unvalidated dataclass models from models.lab_models_fast
+        """
+        if validate:
+            make_section = LabSection
+            make_lab = PersonalizedLab
+            make_metadata = LabGenerationMetadata
+            make_result = CompleteLabResult
+        else:
+            make_section = FastLabSection
+            make_lab = FastPersonalizedLab
+            make_metadata = FastLabGenerationMetadata
+            make_result = FastCompleteLabResult
         
         try:
-            # Determine difficulty
-            difficulty = self._determine_difficulty(concept_name, concept_definition)
-            
-            # Create personalized title
-            if personalization_context:
-                title = f"Hands-On Lab: {concept_name} in {personalization_context.title()}"
-            else:
-                title = f"Hands-On Lab: {concept_name}"
-            
-            # Create exercises
-            exercises = self._create_exercises(concept_name, difficulty, personalization_context)
+            # Title, difficulty, exercises and time in a single cached step
+            title, difficulty, specs, estimated_time = _plan_lab(
+                concept_name, concept_definition, personalization_context
+            )
             
             # Create section
-            section = LabSection(
+            section = make_section(
                 concept=concept_name,
                 title=f"Exploring {concept_name}",
                 difficulty=difficulty,
                 scaffolding_level='medium',
-                exercises=exercises,
+                exercises=_build_exercises(specs, fast=not validate),
                 learning_objectives=[
-                    f"Understand the fundamentals of {concept_name}",
-                    f"Apply {concept_name} in practical scenarios",
-                    f"Implement solutions using {concept_name}"
+                    t.format_map({'c': concept_name}) for t in self._LEARNING_OBJECTIVE_TEMPLATES
                 ],
                 background=concept_definition
             )
             
             # Create lab
-            lab = PersonalizedLab(
+            lab = make_lab(
                 title=title,
                 topic=topic,
                 difficulty=difficulty,
-                estimated_time=self._estimate_time(difficulty, 1),
+                estimated_time=estimated_time,
                 sections=[section],
-                prerequisites=["Basic programming knowledge", "Understanding of databases"],
-                technologies=["Python", "Jupyter Notebook"],
+                prerequisites=list(self._DEFAULT_PREREQS),
+                technologies=list(self._DEFAULT_TECHNOLOGIES),
                 personalization_context=personalization_context
             )
             
             # Create metadata
-            metadata = LabGenerationMetadata(
+            metadata = make_metadata(
                 concept_name=concept_name,
                 concept_definition=concept_definition,
                 source_topic=topic,
@@ -159,7 +268,7 @@ class TemplateLabGenerator:
                 personalization_applied=personalization_context is not None
             )
             
-            return CompleteLabResult(
+            return make_result(
                 lab=lab,
                 metadata=metadata,
                 success=True
@@ -167,9 +276,9 @@ class TemplateLabGenerator:
             
         except Exception as e:
             print(f"❌ Error generating lab for {concept_name}: {e}")
-            return CompleteLabResult(
-                lab=self._create_minimal_lab(concept_name, topic),
-                metadata=LabGenerationMetadata(
+            return make_result(
+                lab=self._create_minimal_lab(concept_name, topic, fast=not validate),
+                metadata=make_metadata(
                     concept_name=concept_name,
                     concept_definition=concept_definition,
                     source_topic=topic,
@@ -180,21 +289,27 @@ class TemplateLabGenerator:
                 error=str(e)
             )
     
-    def _create_minimal_lab(self, concept_name: str, topic: str) -> PersonalizedLab:
-        """Create minimal fallback lab."""
-        return PersonalizedLab(
+    def _create_minimal_lab(self, concept_name: str, topic: str,
+                            fast: bool = False) -> Union[PersonalizedLab, FastPersonalizedLab]:
+        """Create minimal fallback lab, as dataclass models when fast is True."""
+        if fast:
+            make_exercise, make_section, make_lab = FastLabExercise, FastLabSection, FastPersonalizedLab
+        else:
+            make_exercise, make_section, make_lab = LabExercise, LabSection, PersonalizedLab
+        
+        return make_lab(
             title=f"Introduction to {concept_name}",
             topic=topic,
             difficulty="medium",
             estimated_time=45,
             sections=[
-                LabSection(
+                make_section(
                     concept=concept_name,
                     title=f"Learning {concept_name}",
                     difficulty="medium",
                     scaffolding_level="medium",
                     exercises=[
-                        LabExercise(
+                        make_exercise(
                             type="guided",
                             hints=3,
                             description=f"Explore {concept_name}",
@@ -213,32 +328,143 @@ class TemplateLabGenerator:
         )
 
 
+# Probe definition per difficulty; medium and hard labs add a challenge exercise
+_SCHEMA_PROBE_DEFINITIONS = {
+    'easy': "How records are kept in storage",
+    'medium': "A database index used to speed up lookups",
+    'hard': "A sorting algorithm used to order records"
+}
+
+
+def _validate_template_schema() -> None:
+    """
+    Run dataclass template labs through full Pydantic validation.
+    
+    The batch path builds plain dataclasses, which don't validate, so this
+    catches drift between the templates and the models up front. One lab is
+    probed per difficulty, plus the minimal fallback lab.
+    """
+    generator = TemplateLabGenerator()
+    for definition in _SCHEMA_PROBE_DEFINITIONS.values():
+        generator.generate_lab(
+            concept_name="Schema Check",
+            concept_definition=definition,
+            topic="Validation",
+            personalization_context="gaming",
+            validate=False
+        ).to_pydantic()
+    
+    generator._create_minimal_lab("Schema Check", "Validation", fast=True).to_pydantic()
+
+
+# Number of concepts between flushes of the buffered progress report
+LOG_FLUSH_INTERVAL = 50
+
+# Per-process generator instance, created lazily by ``_get_generator`` so each
+# worker builds its difficulty map once instead of once per concept.
+_generator = None
+
+
+def _get_generator() -> TemplateLabGenerator:
+    """Return the generator for the current process, creating it on first use."""
+    global _generator
+    if _generator is None:
+        _generator = TemplateLabGenerator()
+    return _generator
+
+
+def _process_one(concept: ConceptInput, output_dir: Union[str, Path],
+                 personalization_context: str = None, archive: bool = False):
+    """
+    Generate and save the lab for a single concept.
+    
+    Runs inside a worker process, so it must stay a top-level function. Only
+    the lab's summary entry is sent back; the full lab is already on disk.
+    With archive=True nothing is written and the lab itself is returned, for
+    the parent to append to the JSONL archive.
+    
+    Returns:
+        Tuple of (summary entry or None, saved files dict or lab result or error message)
+    """
+    name, definition, topic = concept.name, concept.definition, concept.topic
+    
+    try:
+        result = _get_generator().generate_lab(
+            concept_name=name,
+            concept_definition=definition,
+            topic=topic,
+            personalization_context=personalization_context,
+            validate=False
+        )
+        
+        if archive:
+            return summarize_lab_result(result), result
+        
+        saved_files = organize_lab_output(
+            lab_result=result,
+            output_dir=output_dir,
+            concept_name=name
+        )
+        
+        return summarize_lab_result(result), saved_files
+        
+    except Exception as e:
+        return None, str(e)
+
+
+def _flush_log(lines: List[str]) -> None:
+    """Write buffered report lines to stdout in a single call and clear the buffer."""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+        lines.clear()
+
+
 def generate_all_labs(
     export_path: str = "../lab_tutor/knowledge_graph_builder/complete_neo4j_export_no_embeddings.json",
     output_dir: str = "batch_output",
-    personalization_context: str = None
+    personalization_context: str = None,
+    max_workers: int = 1,
+    jsonl_path: str = None
 ):
     """
     Generate labs for all concepts in the knowledge graph.
     
+    Concepts are independent, so with max_workers > 1 they are spread across
+    a process pool. A template lab takes microseconds, so for typical exports
+    starting the pool costs more than it saves; the default runs in-process.
+    
     Args:
         export_path: Path to Neo4j export file
         output_dir: Output directory for labs
         personalization_context: Optional personalization context
+        max_workers: Number of worker processes; 1 or less runs in-process
+        jsonl_path: Optional JSONL archive to write all labs to instead of
+            per-concept directories; overwritten if it exists
     """
     
     print("="*80)
     print("LAB GENERATION FOR ALL CONCEPTS")
     print("="*80)
     
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     
     # Load concepts
     print(f"\n📁 Loading concepts from: {export_path}")
-    concepts = load_concepts_from_export(export_path)
+    concepts = list(load_concepts_from_export(export_path))
+    loaded_concepts = len(concepts)
+    
+    # Drop duplicate concepts so they aren't generated and written twice,
+    # keeping the first occurrence of each
+    unique_concepts = {}
+    for c in concepts:
+        unique_concepts.setdefault((c.name, c.definition), c)
+    concepts = list(unique_concepts.values())
     total_concepts = len(concepts)
     
     print(f"✅ Loaded {total_concepts} concepts")
+    if total_concepts < loaded_concepts:
+        print(f"🔁 Skipped {loaded_concepts - total_concepts} duplicate concepts")
     
     if personalization_context:
         print(f"🎯 Personalization context: {personalization_context}")
@@ -247,64 +473,80 @@ def generate_all_labs(
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Initialize generator
-    generator = TemplateLabGenerator()
+    # Templates skip validation, so check them once before the batch
+    _validate_template_schema()
     
-    # Process each concept
-    results = []
+    # Process concepts, in a worker pool if requested. Each finished lab is
+    # reduced to a summary line on disk so completed results don't stay in memory.
+    summary_jsonl = output_path / 'generation_summary.jsonl'
     successful = 0
     failed = 0
     
     print(f"\n🚀 Starting lab generation for {total_concepts} concepts...")
     print("="*80)
     
-    for i, concept in enumerate(concepts, 1):
-        # Progress indicator
-        if i % 10 == 0 or i == 1:
-            elapsed = time.time() - start_time
-            avg_time = elapsed / i if i > 0 else 0
-            remaining = avg_time * (total_concepts - i)
-            print(f"\n📊 Progress: {i}/{total_concepts} ({i*100//total_concepts}%)")
-            print(f"⏱️  Elapsed: {elapsed:.1f}s | Remaining: ~{remaining:.1f}s")
-        
-        concept_name = concept['name']
-        print(f"\n{i}. {concept_name}")
+    worker = partial(
+        _process_one,
+        output_dir=output_path,
+        personalization_context=personalization_context,
+        archive=jsonl_path is not None
+    )
+    
+    # Per-concept report lines are buffered and written in blocks so the
+    # terminal isn't hit with several writes for every concept.
+    log_lines = []
+    
+    pool_context = ProcessPoolExecutor(max_workers=max_workers) if max_workers > 1 else nullcontext()
+    
+    if jsonl_path:
+        Path(jsonl_path).parent.mkdir(parents=True, exist_ok=True)
+        archive_context = open(jsonl_path, 'wb')
+    else:
+        archive_context = nullcontext()
+    
+    with pool_context as pool, archive_context as archive_file, \
+            open(summary_jsonl, 'wb') as summary_file:
+        if pool is None:
+            outcomes = map(worker, concepts)
+        else:
+            outcomes = pool.map(worker, concepts, chunksize=8)
         
-        try:
-            # Generate lab
-            result = generator.generate_lab(
-                concept_name=concept['name'],
-                concept_definition=concept['definition'],
-                topic=concept['topic'],
-                personalization_context=personalization_context
-            )
+        for i, (concept, (lab_info, detail)) in enumerate(zip(concepts, outcomes), 1):
+            # Progress indicator at powers of two and on the last concept
+            if i & (i - 1) == 0 or i == total_concepts:
+                elapsed = (time.perf_counter_ns() - start_ns) * 1e-9
+                remaining = elapsed * (total_concepts - i) / i
+                log_lines.append(f"\n📊 Progress: {i}/{total_concepts} ({i*100//total_concepts}%)")
+                log_lines.append(f"⏱️  Elapsed: {elapsed:.1f}s | Remaining: ~{remaining:.1f}s")
             
-            # Save output
-            saved_files = organize_lab_output(
-                lab_result=result,
-                output_dir=output_dir,
-                concept_name=concept['name']
-            )
-            
-            results.append(result)
+            log_lines.append(f"\n{i}. {concept.name}")
             
-            if result.success:
-                successful += 1
-                print(f"   ✅ Success: {result.lab.title}")
-            else:
+            if lab_info is None:
                 failed += 1
-                print(f"   ⚠️  Fallback used: {result.error}")
+                log_lines.append(f"   ❌ Error: {detail}")
+            else:
+                write_summary_line(summary_file, lab_info)
+                if archive_file is not None:
+                    write_lab_line(archive_file, detail)
                 
-        except Exception as e:
-            failed += 1
-            print(f"   ❌ Error: {e}")
+                if lab_info['success']:
+                    successful += 1
+                    log_lines.append(f"   ✅ Success: {lab_info['title']}")
+                else:
+                    failed += 1
+                    log_lines.append(f"   ⚠️  Fallback used: {lab_info.get('error')}")
+            
+            if i % LOG_FLUSH_INTERVAL == 0:
+                _flush_log(log_lines)
+    
+    _flush_log(log_lines)
     
     # Create summary report
     print(f"\n{'='*80}")
     print("📊 Creating summary report...")
-    summary_path = create_summary_report(results, output_dir)
+    summary_path = create_summary_report_from_jsonl(summary_jsonl, output_path)
     
-    processing_time = time.time() - start_time
+    processing_time = (time.perf_counter_ns() - start_ns) * 1e-9
     
     # Print final summary
     print(f"\n{'='*80}")
@@ -316,6 +558,8 @@ def generate_all_labs(
     print(f"⏱️  Total time: {processing_time:.2f} seconds ({processing_time/60:.1f} minutes)")
     print(f"📄 Summary report: {summary_path}")
     print(f"📁 Output directory: {output_dir}")
+    if jsonl_path:
+        print(f"🗃️  Lab archive: {jsonl_path}")
     print(f"{'='*80}")
     
     return {
@@ -324,7 +568,8 @@ def generate_all_labs(
         'failed': failed,
         'processing_time': processing_time,
         'summary_path': str(summary_path),
-        'results': results
+        'summary_jsonl_path': str(summary_jsonl),
+        'jsonl_path': jsonl_path
     }
 
 
@@ -339,6 +584,10 @@ if __name__ == '__main__':
                        help='Output directory')
     parser.add_argument('--personalize', type=str, default=None,
                        help='Personalization context (e.g., gaming, music, sports)')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Number of worker processes (default: 1, in-process)')
+    parser.add_argument('--jsonl', type=str, default=None,
+                       help='Write all labs to this JSONL archive instead of per-concept directories')
     
     args = parser.parse_args()
     
@@ -346,6 +595,8 @@ if __name__ == '__main__':
     generate_all_labs(
         export_path=args.export_path,
         output_dir=args.output_dir,
-        personalization_context=args.personalize
+        personalization_context=args.personalize,
+        max_workers=args.jobs,
+        jsonl_path=args.jsonl
     )
 
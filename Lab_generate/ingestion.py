@@ -9,20 +9,29 @@ Usage:
     python ingestion.py --mode single --concept "NoSQL Database"
     python ingestion.py --mode batch --output-dir batch_output
     python ingestion.py --mode batch --personalize "gaming"
+    python ingestion.py --mode batch --jobs 8
 """
 
 import argparse
+import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 from typing import Optional, List
 
 from services.lab_generation_service import LabGenerationService
 from utils.file_utils import (
+    ConceptInput,
     load_concepts_from_export,
     organize_lab_output,
+    summarize_lab_result,
     create_summary_report
 )
 
+# Concurrent LLM requests in batch mode, for both the CLI and direct callers
+DEFAULT_JOBS = 4
+
 
 class LabIngestionService:
     """
@@ -111,16 +120,22 @@ class LabIngestionService:
         export_path: str,
         output_dir: str = "batch_output",
         personalization_context: Optional[str] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        max_workers: int = DEFAULT_JOBS
     ) -> dict:
         """
         Generate labs for all concepts in the knowledge graph.
         
+        Each concept is an independent LLM request, so requests run on a
+        thread pool while the previous ones are waiting on the network.
+        
         Args:
             export_path: Path to complete_neo4j_export_no_embeddings.json
             output_dir: Output directory for labs
             personalization_context: Optional personalization context
             limit: Optional limit on number of concepts to process
+            max_workers: Number of concurrent requests (kept low by default
+                so API rate limits aren't hit)
         
         Returns:
             Dictionary with batch processing results
@@ -132,9 +147,11 @@ class LabIngestionService:
         concepts = load_concepts_from_export(export_path)
         
         if limit:
-            concepts = concepts[:limit]
+            concepts = islice(concepts, limit)
             print(f"⚠️  Limited to first {limit} concepts")
         
+        concepts = list(concepts)
+        
         total_concepts = len(concepts)
         print(f"🚀 Starting batch lab generation for {total_concepts} concepts")
         
@@ -145,35 +162,38 @@ class LabIngestionService:
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        # Process each concept
+        # Process concepts concurrently
         results = []
         successful = 0
         failed = 0
         
-        for i, concept in enumerate(concepts, 1):
-            print(f"\n{'='*60}")
-            print(f"Processing {i}/{total_concepts}: {concept['name']}")
-            print(f"{'='*60}")
-            
+        def process(concept: ConceptInput) -> dict:
+            name, definition, topic = concept.name, concept.definition, concept.topic
             try:
-                result = self.generate_single_lab(
-                    concept_name=concept['name'],
-                    concept_definition=concept['definition'],
-                    topic=concept['topic'],
+                return self.generate_single_lab(
+                    concept_name=name,
+                    concept_definition=definition,
+                    topic=topic,
                     output_dir=output_dir,
                     personalization_context=personalization_context
                 )
+            except Exception as e:
+                return {'success': False, 'concept_name': name, 'error': str(e)}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for i, result in enumerate(pool.map(process, concepts), 1):
+                print(f"\n{'='*60}\n"
+                      f"Processed {i}/{total_concepts}: {result['concept_name']}\n"
+                      f"{'='*60}")
                 
-                results.append(result['result'])
+                # Keep only the summary entry; the full lab is already on disk
+                if 'result' in result:
+                    results.append(summarize_lab_result(result['result']))
                 
                 if result['success']:
                     successful += 1
                 else:
                     failed += 1
-                    
-            except Exception as e:
-                failed += 1
-                print(f"❌ Error processing {concept['name']}: {e}")
         
         # Create summary report
         print(f"\n{'='*60}")
@@ -251,6 +271,13 @@ def main():
         help='Limit number of concepts to process (for testing)'
     )
     
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f'Number of concurrent lab generation requests in batch mode (default: {DEFAULT_JOBS})'
+    )
+    
     parser.add_argument(
         '--model',
         type=str,
@@ -281,7 +308,7 @@ def main():
         # Load concepts to find the specified one
         concepts = load_concepts_from_export(args.export_path)
         concept_data = next(
-            (c for c in concepts if c['name'].lower() == args.concept.lower()),
+            (c for c in concepts if c.name.lower() == args.concept.lower()),
             None
         )
         
@@ -291,9 +318,9 @@ def main():
         
         # Generate single lab
         ingestion_service.generate_single_lab(
-            concept_name=concept_data['name'],
-            concept_definition=concept_data['definition'],
-            topic=concept_data['topic'],
+            concept_name=concept_data.name,
+            concept_definition=concept_data.definition,
+            topic=concept_data.topic,
             output_dir=args.output_dir,
             personalization_context=args.personalize
         )
@@ -304,10 +331,14 @@ def main():
             export_path=args.export_path,
             output_dir=args.output_dir,
             personalization_context=args.personalize,
-            limit=args.limit
+            limit=args.limit,
+            max_workers=args.jobs
         )
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    # httpx logs every request at INFO; keep progress lines readable
+    logging.getLogger("httpx").setLevel(logging.WARNING)
     main()
 
@@ -9,12 +9,24 @@ from .lab_models import (
     LabGenerationMetadata,
     CompleteLabResult
 )
+from .lab_models_fast import (
+    FastLabExercise,
+    FastLabSection,
+    FastPersonalizedLab,
+    FastLabGenerationMetadata,
+    FastCompleteLabResult
+)
 
 __all__ = [
     'LabExercise',
     'LabSection',
     'PersonalizedLab',
     'LabGenerationMetadata',
-    'CompleteLabResult'
+    'CompleteLabResult',
+    'FastLabExercise',
+    'FastLabSection',
+    'FastPersonalizedLab',
+    'FastLabGenerationMetadata',
+    'FastCompleteLabResult'
 ]
 
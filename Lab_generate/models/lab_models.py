@@ -123,6 +123,10 @@ class LabGenerationMetadata(BaseModel):
         default=False,
         description="Whether personalization was applied"
     )
+    cache_hit: bool = Field(
+        default=False,
+        description="Whether the lab was served from the response cache"
+    )
 
 
 class CompleteLabResult(BaseModel):
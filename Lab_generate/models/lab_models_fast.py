@@ -0,0 +1,106 @@
+"""
+Lightweight dataclass counterparts of the lab models.
+
+The template generator produces every field value itself and serializes the
+result straight away, so it does not need Pydantic's runtime validation. These
+frozen, slotted dataclasses mirror the Pydantic models field for field and can
+be converted back with ``to_pydantic()`` wherever the validated types are needed.
+"""
+
+import sys
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from .lab_models import (
+    LabExercise,
+    LabSection,
+    PersonalizedLab,
+    LabGenerationMetadata,
+    CompleteLabResult
+)
+
+# slots=True needs Python 3.10+; older interpreters fall back to __dict__ instances
+_DATACLASS_OPTIONS = {'frozen': True}
+if sys.version_info >= (3, 10):
+    _DATACLASS_OPTIONS['slots'] = True
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class FastLabExercise:
+    """Dataclass version of LabExercise."""
+
+    type: str
+    hints: int
+    description: Optional[str] = None
+    starter_code: Optional[str] = None
+    solution: Optional[str] = None
+    test_cases: Optional[List[dict]] = None
+
+    def to_pydantic(self) -> LabExercise:
+        """Convert to a validated LabExercise."""
+        return LabExercise.model_validate(asdict(self))
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class FastLabSection:
+    """Dataclass version of LabSection."""
+
+    concept: str
+    title: str
+    difficulty: str
+    scaffolding_level: str
+    exercises: List[FastLabExercise]
+    learning_objectives: Optional[List[str]] = None
+    background: Optional[str] = None
+
+    def to_pydantic(self) -> LabSection:
+        """Convert to a validated LabSection."""
+        return LabSection.model_validate(asdict(self))
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class FastPersonalizedLab:
+    """Dataclass version of PersonalizedLab."""
+
+    title: str
+    topic: str
+    difficulty: str
+    estimated_time: int
+    sections: List[FastLabSection]
+    prerequisites: Optional[List[str]] = None
+    technologies: Optional[List[str]] = None
+    personalization_context: Optional[str] = None
+
+    def to_pydantic(self) -> PersonalizedLab:
+        """Convert to a validated PersonalizedLab."""
+        return PersonalizedLab.model_validate(asdict(self))
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class FastLabGenerationMetadata:
+    """Dataclass version of LabGenerationMetadata."""
+
+    concept_name: str
+    concept_definition: str
+    source_topic: str
+    model_used: Optional[str] = "gpt-4"
+    personalization_applied: bool = False
+    cache_hit: bool = False
+
+    def to_pydantic(self) -> LabGenerationMetadata:
+        """Convert to a validated LabGenerationMetadata."""
+        return LabGenerationMetadata.model_validate(asdict(self))
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class FastCompleteLabResult:
+    """Dataclass version of CompleteLabResult."""
+
+    lab: FastPersonalizedLab
+    metadata: FastLabGenerationMetadata
+    success: bool = True
+    error: Optional[str] = None
+
+    def to_pydantic(self) -> CompleteLabResult:
+        """Convert to a validated CompleteLabResult."""
+        return CompleteLabResult.model_validate(asdict(self))
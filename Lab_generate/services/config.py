@@ -0,0 +1,29 @@
+"""
+Configuration for the lab generation services.
+
+Environment settings are read lazily, on first use, so importing the services
+does not parse the .env file.
+"""
+
+import os
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+@lru_cache(maxsize=1)
+def get_openai_key() -> str:
+    """
+    Get the OpenAI API key, loading .env on first call.
+    
+    Returns:
+        The OPENAI_API_KEY value
+    
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set
+    """
+    load_dotenv()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable not set")
+    return api_key
@@ -5,87 +5,50 @@ This service generates personalized labs for each concept in the knowledge graph
 with customization based on student interests and hobbies.
 """
 
+import asyncio
+import hashlib
+import json
+import logging
 import os
-from typing import Optional, List, Dict, Any
-from dotenv import load_dotenv
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Union
+import httpx
+from openai import OpenAI
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 
+from services.config import get_openai_key
+from utils.file_utils import ConceptInput
 from models.lab_models import (
     PersonalizedLab,
-    LabSection,
-    LabExercise,
     LabGenerationMetadata,
     CompleteLabResult
 )
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
+# Connection pool shared by all requests of a service, so concurrent and repeated
+# calls reuse warm keep-alive connections instead of a new TCP+TLS handshake each
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
 
-class LabGenerationService:
-    """
-    Service for generating personalized coding labs based on concepts.
-    Uses LLM to create engaging, contextual lab exercises.
-    """
-    
-    def __init__(self, model_name: str = "gpt-4", temperature: float = 0.7):
-        """
-        Initialize the lab generation service.
-        
-        Args:
-            model_name: OpenAI model to use for generation
-            temperature: Temperature for generation (0.0-1.0)
-        """
-        self.model_name = model_name
-        self.temperature = temperature
-        
-        # Initialize LLM
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        
-        self.llm = ChatOpenAI(
-            model=model_name,
-            temperature=temperature,
-            api_key=api_key
-        )
-        
-        # Initialize output parser
-        self.parser = JsonOutputParser(pydantic_object=PersonalizedLab)
-    
-    def _create_lab_prompt(self, concept_name: str, concept_definition: str, 
-                          topic: str, personalization_context: Optional[str] = None) -> str:
-        """
-        Create a prompt for lab generation.
-        
-        Args:
-            concept_name: Name of the concept
-            concept_definition: Definition of the concept
-            topic: Topic the concept belongs to
-            personalization_context: Optional context for personalization (e.g., hobbies)
-        
-        Returns:
-            Formatted prompt string
-        """
-        base_prompt = f"""You are an expert educator creating hands-on coding labs for big data and database concepts.
+# Keywords marking concepts whose labs tend to come back long (multi-section)
+HARD_CONCEPT_KEYWORDS = (
+    'theorem', 'consistency', 'consensus', 'distributed', 'transaction',
+    'replication', 'partition', 'algorithm'
+)
 
-Generate a personalized lab for the following concept:
+# Requests in flight per predicted difficulty, within the batch-wide limit: long
+# generations get fewer slots so they can't crowd out the short ones
+BUCKET_CONCURRENCY = {'easy': 16, 'medium': 8, 'hard': 4}
 
-**Concept**: {concept_name}
-**Definition**: {concept_definition}
-**Topic**: {topic}
-"""
-        
-        if personalization_context:
-            base_prompt += f"""
-**Personalization Context**: {personalization_context}
+# Role and structure instructions for the lab prompt
+_STATIC_INSTRUCTIONS = """You are an expert educator creating hands-on coding labs for big data and database concepts.
 
-Please incorporate this context into the lab examples and scenarios to make it more engaging and relatable.
-For example, if the context is "gaming", use gaming-related examples like player databases, leaderboards, etc.
-"""
-        
-        base_prompt += """
+Generate a personalized lab for the concept given at the end of this prompt.
 
 Create a comprehensive lab with the following structure:
 
@@ -110,7 +73,10 @@ Create a comprehensive lab with the following structure:
 Make the lab practical, hands-on, and focused on real-world applications of the concept.
 Include code examples that students can actually run and modify.
 
-Return ONLY valid JSON matching this exact structure:
+"""
+
+# JSON skeleton for the response; not needed when the API enforces the schema
+_SCHEMA_BLOCK = """Return ONLY valid JSON matching this exact structure:
 {
   "title": "string",
   "topic": "string",
@@ -140,8 +106,348 @@ Return ONLY valid JSON matching this exact structure:
   "technologies": ["string"],
   "personalization_context": "string or null"
 }
+
+"""
+
+_CONCEPT_HEADER = "The concept to create the lab for:\n"
+
+# Invariant part of the lab prompt. It comes first so that every request shares
+# a byte-identical prefix, which lets provider-side prompt caching reuse it.
+STATIC_PREFIX = _STATIC_INSTRUCTIONS + _SCHEMA_BLOCK + _CONCEPT_HEADER
+STRUCTURED_PREFIX = _STATIC_INSTRUCTIONS + _CONCEPT_HEADER
+
+
+def _format_personalization(personalization_context: str) -> str:
+    """Build the prompt block asking for labs themed around a context."""
+    return f"""
+**Personalization Context**: {personalization_context}
+
+Please incorporate this context into the lab examples and scenarios to make it more engaging and relatable.
+For example, if the context is "gaming", use gaming-related examples like player databases, leaderboards, etc.
 """
-        return base_prompt
+
+
+# Personalization blocks for common contexts, built once at import time
+_PERSONALIZATION_BLOCKS = {
+    context: _format_personalization(context)
+    for context in ("gaming", "sports", "music", "movies", "travel", "food")
+}
+
+# How much of a streamed response may arrive without any sign of JSON before it
+# is treated as prose; room for a short preamble before a ```json fence
+JSON_PROBE_CHARS = 500
+
+
+def _check_response_head(parts: List[str], complete: bool = False) -> bool:
+    """
+    Check the start of a streamed response for the beginning of its JSON.
+    
+    Args:
+        parts: Content chunks received so far
+        complete: Whether the stream has ended
+    
+    Returns:
+        True once a JSON object or code fence has started, False if more
+        chunks are needed to tell
+    """
+    head = "".join(parts)
+    
+    # The parser accepts bare JSON or a fenced ```json block, possibly after
+    # a preamble, so either marker settles it
+    if '{' in head or '```' in head:
+        return True
+    if complete or len(head) >= JSON_PROBE_CHARS:
+        raise ValueError(f"LLM response does not look like JSON: {head[:JSON_PROBE_CHARS]!r}")
+    return False
+
+
+# Concept-independent fields of the fallback lab used when generation fails
+_FALLBACK_EXERCISE = {
+    'type': "guided",
+    'hints': 3,
+    'starter_code': "# TODO: Implement your solution here\n",
+    'solution': "# Solution will be provided"
+}
+_FALLBACK_SECTION = {'difficulty': "medium", 'scaffolding_level': "medium"}
+_FALLBACK_LAB = {
+    'difficulty': "medium",
+    'estimated_time': 45,
+    'prerequisites': ("Basic programming knowledge",),
+    'technologies': ("Python", "Jupyter Notebook"),
+    'personalization_context': None
+}
+
+# Structured outputs schema for PersonalizedLab. strict mode is left off: it
+# rejects the free-form test_cases dicts and optional fields with defaults.
+LAB_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "PersonalizedLab",
+        "schema": PersonalizedLab.model_json_schema(),
+        "strict": False
+    }
+}
+
+
+class LabGenerationService:
+    """
+    Service for generating personalized coding labs based on concepts.
+    Uses LLM to create engaging, contextual lab exercises.
+    """
+    
+    def __init__(self, model_name: str = "gpt-4", temperature: float = 0.7,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 cache_mode: Optional[str] = None,
+                 structured_output: bool = False):
+        """
+        Initialize the lab generation service.
+        
+        Args:
+            model_name: OpenAI model to use for generation
+            temperature: Temperature for generation (0.0-1.0)
+            cache_dir: Optional directory for caching generated labs by prompt.
+                Only used when temperature is 0 or cache_mode is "exact".
+            cache_mode: Set to "exact" to also cache responses sampled at
+                temperature > 0, replaying the first response for a prompt
+            structured_output: Enforce the lab schema with the API's
+                response_format instead of spelling it out in the prompt.
+                Requires a model with structured outputs (e.g. gpt-4o).
+        """
+        self.model_name = model_name
+        self.temperature = temperature
+        
+        # Exact-match response cache, only safe by default for deterministic sampling
+        if cache_mode not in (None, "exact"):
+            raise ValueError(f"Unknown cache_mode: {cache_mode}")
+        self.cache_dir = None
+        if cache_dir is not None and (temperature == 0 or cache_mode == "exact"):
+            self.cache_dir = Path(cache_dir)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        # With structured outputs the schema travels as response_format,
+        # so the prompt can drop its JSON skeleton
+        self.response_format = LAB_RESPONSE_FORMAT if structured_output else None
+        self._prompt_prefix = STRUCTURED_PREFIX if structured_output else STATIC_PREFIX
+        
+        # Initialize LLM. The sync connection pool is shared for the life of the
+        # service; async pools are tied to an event loop, so batch runs open their
+        # own (see agenerate_batch_labs)
+        self._api_key = get_openai_key()
+        self._http_client = httpx.Client(limits=HTTP_LIMITS)
+        self.llm = self._make_llm()
+        
+        # Raw OpenAI client for the Batch API, created on first use
+        self._client = None
+        
+        # Initialize output parser
+        self.parser = JsonOutputParser(pydantic_object=PersonalizedLab)
+    
+    def _make_llm(self, http_async_client: Optional[httpx.AsyncClient] = None):
+        """
+        Build the chat model for this service's settings.
+        
+        Args:
+            http_async_client: Optional async HTTP client for the model to use
+        
+        Returns:
+            ChatOpenAI model, bound to the response_format for structured outputs
+        """
+        llm = ChatOpenAI(
+            model=self.model_name,
+            temperature=self.temperature,
+            api_key=self._api_key,
+            http_client=self._http_client,
+            http_async_client=http_async_client
+        )
+        if self.response_format:
+            llm = llm.bind(response_format=self.response_format)
+        return llm
+    
+    def _create_lab_prompt(self, concept_name: str, concept_definition: str, 
+                          topic: str, personalization_context: Optional[str] = None) -> str:
+        """
+        Create a prompt for lab generation.
+        
+        Args:
+            concept_name: Name of the concept
+            concept_definition: Definition of the concept
+            topic: Topic the concept belongs to
+            personalization_context: Optional context for personalization (e.g., hobbies)
+        
+        Returns:
+            Formatted prompt string
+        """
+        parts = [
+            self._prompt_prefix,
+            f"\n**Concept**: {concept_name}\n**Definition**: {concept_definition}\n**Topic**: {topic}\n"
+        ]
+        
+        if personalization_context:
+            parts.append(
+                _PERSONALIZATION_BLOCKS.get(personalization_context)
+                or _format_personalization(personalization_context)
+            )
+        
+        return "".join(parts)
+    
+    def _build_result(self, content: str, concept_name: str, concept_definition: str,
+                      topic: str, personalization_context: Optional[str] = None) -> CompleteLabResult:
+        """
+        Parse an LLM response into a CompleteLabResult.
+        
+        Args:
+            content: Raw response content from the LLM
+            concept_name: Name of the concept
+            concept_definition: Definition of the concept
+            topic: Topic the concept belongs to
+            personalization_context: Optional context for personalization
+        
+        Returns:
+            CompleteLabResult with generated lab and metadata
+        """
+        # Parse response
+        lab_data = self.parser.parse(content)
+        
+        return self._result_from_data(
+            lab_data, concept_name, concept_definition, topic, personalization_context
+        )
+    
+    def _result_from_data(self, lab_data: Dict[str, Any], concept_name: str,
+                          concept_definition: str, topic: str,
+                          personalization_context: Optional[str] = None,
+                          cache_hit: bool = False) -> CompleteLabResult:
+        """
+        Wrap parsed lab data in a CompleteLabResult.
+        
+        Args:
+            lab_data: Lab dictionary parsed from an LLM response or the cache
+            concept_name: Name of the concept
+            concept_definition: Definition of the concept
+            topic: Topic the concept belongs to
+            personalization_context: Optional context for personalization
+            cache_hit: Whether lab_data came from the response cache
+        
+        Returns:
+            CompleteLabResult with generated lab and metadata
+        """
+        # Create PersonalizedLab object
+        lab = PersonalizedLab(**lab_data)
+        
+        # Create metadata
+        metadata = LabGenerationMetadata(
+            concept_name=concept_name,
+            concept_definition=concept_definition,
+            source_topic=topic,
+            model_used=self.model_name,
+            personalization_applied=personalization_context is not None,
+            cache_hit=cache_hit
+        )
+        
+        return CompleteLabResult(
+            lab=lab,
+            metadata=metadata,
+            success=True
+        )
+    
+    def _cache_path(self, prompt: str) -> Optional[Path]:
+        """
+        Get the cache file for a prompt, or None when caching is disabled.
+        
+        Args:
+            prompt: The full prompt sent to the LLM
+        
+        Returns:
+            Path of the cache entry for this model, temperature and prompt
+        """
+        if self.cache_dir is None:
+            return None
+        
+        key = hashlib.sha256(json.dumps(
+            {"model": self.model_name, "temp": self.temperature, "prompt": prompt},
+            sort_keys=True
+        ).encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json"
+    
+    def _cached_result(self, cache_path: Optional[Path], concept_name: str,
+                       concept_definition: str, topic: str,
+                       personalization_context: Optional[str] = None) -> Optional[CompleteLabResult]:
+        """
+        Build a result from the cache entry for a prompt.
+        
+        Args:
+            cache_path: Path from _cache_path, or None when caching is disabled
+            concept_name: Name of the concept
+            concept_definition: Definition of the concept
+            topic: Topic the concept belongs to
+            personalization_context: Optional context for personalization
+        
+        Returns:
+            CompleteLabResult marked as a cache hit, or None on a miss. Unreadable
+            or outdated entries count as a miss.
+        """
+        if cache_path is None:
+            return None
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                lab_data = json.load(f)
+            return self._result_from_data(
+                lab_data, concept_name, concept_definition, topic,
+                personalization_context, cache_hit=True
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Ignoring unusable cache entry %s: %s", cache_path, e)
+            return None
+    
+    def _store_cached(self, cache_path: Optional[Path], result: CompleteLabResult) -> None:
+        """Atomically write a generated lab to the cache; failures are only logged."""
+        if cache_path is None:
+            return
+        tmp_path = None
+        try:
+            # Unique temp file per call, so concurrent writers of one prompt don't collide
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.cache_dir,
+                                             suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                json.dump(result.lab.model_dump(mode='json'), f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("Could not write cache entry %s: %s", cache_path, e)
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+    
+    def _error_result(self, error: Exception, concept_name: str, concept_definition: str,
+                      topic: str) -> CompleteLabResult:
+        """
+        Build the fallback result returned when generation fails.
+        
+        Args:
+            error: Exception raised during generation
+            concept_name: Name of the concept
+            concept_definition: Definition of the concept
+            topic: Topic the concept belongs to
+        
+        Returns:
+            CompleteLabResult wrapping a fallback lab
+        """
+        logger.warning("Error generating lab for %s: %s", concept_name, error)
+        
+        return CompleteLabResult(
+            lab=self._create_fallback_lab(concept_name, topic),
+            metadata=LabGenerationMetadata(
+                concept_name=concept_name,
+                concept_definition=concept_definition,
+                source_topic=topic,
+                model_used=self.model_name,
+                personalization_applied=False
+            ),
+            success=False,
+            error=str(error)
+        )
     
     def generate_lab(self, concept_name: str, concept_definition: str, 
                     topic: str, personalization_context: Optional[str] = None) -> CompleteLabResult:
@@ -166,46 +472,85 @@ Return ONLY valid JSON matching this exact structure:
                 personalization_context=personalization_context
             )
             
-            # Generate lab using LLM
-            response = self.llm.invoke(prompt)
+            # Serve repeated prompts from the cache
+            cache_path = self._cache_path(prompt)
+            cached = self._cached_result(
+                cache_path, concept_name, concept_definition, topic, personalization_context
+            )
+            if cached is not None:
+                return cached
             
-            # Parse response
-            lab_data = self.parser.parse(response.content)
+            # Stream the lab from the LLM, giving up early on non-JSON output
+            parts = []
+            head_checked = False
+            for chunk in self.llm.stream(prompt):
+                parts.append(chunk.content)
+                if not head_checked:
+                    head_checked = _check_response_head(parts)
+            if not head_checked:
+                _check_response_head(parts, complete=True)
             
-            # Create PersonalizedLab object
-            lab = PersonalizedLab(**lab_data)
+            result = self._build_result(
+                "".join(parts), concept_name, concept_definition, topic, personalization_context
+            )
+            self._store_cached(cache_path, result)
+            return result
             
-            # Create metadata
-            metadata = LabGenerationMetadata(
+        except Exception as e:
+            return self._error_result(e, concept_name, concept_definition, topic)
+    
+    async def agenerate_lab(self, concept_name: str, concept_definition: str,
+                            topic: str, personalization_context: Optional[str] = None,
+                            llm=None) -> CompleteLabResult:
+        """
+        Async version of generate_lab.
+        
+        Args:
+            concept_name: Name of the concept
+            concept_definition: Definition of the concept
+            topic: Topic the concept belongs to
+            personalization_context: Optional context for personalization
+            llm: Optional chat model to use instead of self.llm, e.g. one bound
+                to the current event loop's HTTP client
+        
+        Returns:
+            CompleteLabResult with generated lab and metadata
+        """
+        try:
+            # Create prompt
+            prompt = self._create_lab_prompt(
                 concept_name=concept_name,
                 concept_definition=concept_definition,
-                source_topic=topic,
-                model_used=self.model_name,
-                personalization_applied=personalization_context is not None
+                topic=topic,
+                personalization_context=personalization_context
             )
             
-            return CompleteLabResult(
-                lab=lab,
-                metadata=metadata,
-                success=True
+            # Serve repeated prompts from the cache
+            cache_path = self._cache_path(prompt)
+            cached = self._cached_result(
+                cache_path, concept_name, concept_definition, topic, personalization_context
             )
+            if cached is not None:
+                return cached
             
-        except Exception as e:
-            print(f"❌ Error generating lab for {concept_name}: {e}")
+            # Stream the lab from the LLM, giving up early on non-JSON output
+            parts = []
+            head_checked = False
+            async for chunk in (llm or self.llm).astream(prompt):
+                parts.append(chunk.content)
+                if not head_checked:
+                    head_checked = _check_response_head(parts)
+            if not head_checked:
+                _check_response_head(parts, complete=True)
             
-            # Return error result
-            return CompleteLabResult(
-                lab=self._create_fallback_lab(concept_name, topic),
-                metadata=LabGenerationMetadata(
-                    concept_name=concept_name,
-                    concept_definition=concept_definition,
-                    source_topic=topic,
-                    model_used=self.model_name,
-                    personalization_applied=False
-                ),
-                success=False,
-                error=str(e)
+            result = self._build_result(
+                "".join(parts), concept_name, concept_definition, topic, personalization_context
             )
+            self._store_cached(cache_path, result)
+            return result
+            
+        except Exception as e:
+            return self._error_result(e, concept_name, concept_definition, topic)
     
     def _create_fallback_lab(self, concept_name: str, topic: str) -> PersonalizedLab:
         """
@@ -218,69 +563,295 @@ Return ONLY valid JSON matching this exact structure:
         Returns:
             Basic PersonalizedLab object
         """
-        return PersonalizedLab(
-            title=f"Introduction to {concept_name}",
-            topic=topic,
-            difficulty="medium",
-            estimated_time=45,
-            sections=[
-                LabSection(
-                    concept=concept_name,
-                    title=f"Exploring {concept_name}",
-                    difficulty="medium",
-                    scaffolding_level="medium",
-                    exercises=[
-                        LabExercise(
-                            type="guided",
-                            hints=3,
-                            description=f"Learn the basics of {concept_name}",
-                            starter_code="# TODO: Implement your solution here\n",
-                            solution="# Solution will be provided",
-                            test_cases=[]
-                        )
-                    ],
-                    learning_objectives=[f"Understand {concept_name}"],
-                    background=f"This lab introduces {concept_name}"
+        # One validation pass over a plain dict built from the static template
+        # is cheaper than constructing each nested model; this path runs for
+        # every concept during an API outage
+        return PersonalizedLab.model_validate({
+            **_FALLBACK_LAB,
+            'title': f"Introduction to {concept_name}",
+            'topic': topic,
+            'sections': [{
+                **_FALLBACK_SECTION,
+                'concept': concept_name,
+                'title': f"Exploring {concept_name}",
+                'exercises': [{
+                    **_FALLBACK_EXERCISE,
+                    'description': f"Learn the basics of {concept_name}",
+                    'test_cases': []
+                }],
+                'learning_objectives': [f"Understand {concept_name}"],
+                'background': f"This lab introduces {concept_name}"
+            }]
+        })
+    
+    async def _bounded(self, sem: asyncio.Semaphore, batch_sem: asyncio.Semaphore,
+                       index: int, total: int, concept: ConceptInput,
+                       personalization_context: Optional[str] = None,
+                       llm=None) -> CompleteLabResult:
+        """Generate one lab of a batch once both its bin and the batch have a free slot."""
+        name = concept.name
+        
+        async with sem, batch_sem:
+            result = await self.agenerate_lab(
+                concept_name=name,
+                concept_definition=concept.definition,
+                topic=concept.topic,
+                personalization_context=personalization_context,
+                llm=llm
+            )
+        
+        # One log record per concept; failures were already logged with
+        # their error by _error_result
+        if result.success:
+            logger.info("Generated lab %d/%d: %s", index, total, name)
+        
+        return result
+    
+    @staticmethod
+    def _predict_difficulty(concept: ConceptInput) -> str:
+        """
+        Cheaply predict how long the lab for a concept will be.
+        
+        Args:
+            concept: ConceptInput to classify
+        
+        Returns:
+            'easy', 'medium' or 'hard'
+        """
+        definition = concept.definition
+        haystack = f"{concept.name}\n{definition}".casefold()
+        if any(keyword in haystack for keyword in HARD_CONCEPT_KEYWORDS):
+            return 'hard'
+        
+        if len(definition) > 200:
+            return 'hard'
+        elif len(definition) > 100:
+            return 'medium'
+        else:
+            return 'easy'
+    
+    async def _generate_bucket(self, bucket: List[Tuple[int, ConceptInput]], concurrency: int,
+                               batch_sem: asyncio.Semaphore, total: int,
+                               personalization_context: Optional[str] = None,
+                               llm=None) -> List[Tuple[int, CompleteLabResult]]:
+        """Generate the labs of one difficulty bucket, tagged with their batch index."""
+        sem = asyncio.Semaphore(concurrency)
+        results = await asyncio.gather(*[
+            self._bounded(sem, batch_sem, i, total, concept, personalization_context, llm)
+            for i, concept in bucket
+        ])
+        return [(i, result) for (i, _), result in zip(bucket, results)]
+    
+    async def agenerate_batch_labs(self, concepts: List[ConceptInput],
+                                   personalization_context: Optional[str] = None,
+                                   max_concurrency: int = 10) -> List[CompleteLabResult]:
+        """
+        Generate labs for multiple concepts concurrently.
+        
+        Concepts are binned by predicted difficulty and each bin also has its
+        own limit from BUCKET_CONCURRENCY, so a few long "hard" generations
+        can't take every slot and hold up the short ones.
+        
+        Args:
+            concepts: List of ConceptInput objects
+            personalization_context: Optional context for personalization
+            max_concurrency: Maximum number of LLM requests in flight at once
+                across all bins, to stay within the API rate limits
+        
+        Returns:
+            List of CompleteLabResult objects, in the same order as concepts
+        """
+        total = len(concepts)
+        
+        buckets = {difficulty: [] for difficulty in BUCKET_CONCURRENCY}
+        for i, concept in enumerate(concepts, 1):
+            buckets[self._predict_difficulty(concept)].append((i, concept))
+        
+        print(f"🚀 Generating labs for {total} concepts "
+              f"({', '.join(f'{len(b)} {d}' for d, b in buckets.items())})...")
+        
+        batch_sem = asyncio.Semaphore(max_concurrency)
+        
+        # Pooled connections belong to the event loop that opened them, and
+        # generate_batch_labs runs every batch in a fresh loop, so the async
+        # pool lives exactly as long as this batch
+        async with httpx.AsyncClient(limits=HTTP_LIMITS) as http_client:
+            llm = self._make_llm(http_async_client=http_client)
+            bucket_results = await asyncio.gather(*[
+                self._generate_bucket(
+                    bucket, BUCKET_CONCURRENCY[difficulty], batch_sem, total,
+                    personalization_context, llm
                 )
-            ],
-            prerequisites=["Basic programming knowledge"],
-            technologies=["Python", "Jupyter Notebook"],
-            personalization_context=None
-        )
+                for difficulty, bucket in buckets.items()
+                if bucket
+            ])
+        
+        # Restore the input order
+        results = [None] * total
+        for bucket in bucket_results:
+            for i, result in bucket:
+                results[i - 1] = result
+        return results
     
-    def generate_batch_labs(self, concepts: List[Dict[str, str]], 
-                           personalization_context: Optional[str] = None) -> List[CompleteLabResult]:
+    def generate_batch_labs(self, concepts: List[ConceptInput], 
+                           personalization_context: Optional[str] = None,
+                           max_concurrency: int = 10) -> List[CompleteLabResult]:
         """
         Generate labs for multiple concepts.
         
+        Runs agenerate_batch_labs in a new event loop, so it must not be called
+        from inside a running loop; await agenerate_batch_labs there instead.
+        
         Args:
-            concepts: List of concept dictionaries with 'name', 'definition', and 'topic'
+            concepts: List of ConceptInput objects
             personalization_context: Optional context for personalization
+            max_concurrency: Maximum number of LLM requests in flight at once
         
         Returns:
             List of CompleteLabResult objects
         """
-        results = []
-        total = len(concepts)
+        return asyncio.run(
+            self.agenerate_batch_labs(concepts, personalization_context, max_concurrency)
+        )
+    
+    def _get_client(self) -> OpenAI:
+        """Return the OpenAI client used for Batch API calls."""
+        if self._client is None:
+            self._client = OpenAI(api_key=self._api_key, http_client=self._http_client)
+        return self._client
+    
+    def submit_batch(self, concepts: List[ConceptInput],
+                     personalization_context: Optional[str] = None) -> str:
+        """
+        Submit lab generation for many concepts as one OpenAI batch job.
         
-        print(f"🚀 Generating labs for {total} concepts...")
+        Batch jobs cost half as much as real-time requests and are not bound by
+        the per-minute rate limits, at the price of completing within 24 hours.
+        Collect the results with poll_batch.
         
-        for i, concept in enumerate(concepts, 1):
-            print(f"🔄 Processing {i}/{total}: {concept['name']}")
-            
-            result = self.generate_lab(
-                concept_name=concept['name'],
-                concept_definition=concept['definition'],
-                topic=concept['topic'],
+        Args:
+            concepts: List of ConceptInput objects
+            personalization_context: Optional context for personalization
+        
+        Returns:
+            ID of the submitted batch
+        """
+        names = [concept.name for concept in concepts]
+        if len(set(names)) != len(names):
+            raise ValueError("Concept names must be unique within a batch")
+        
+        lines = []
+        for concept in concepts:
+            prompt = self._create_lab_prompt(
+                concept_name=concept.name,
+                concept_definition=concept.definition,
+                topic=concept.topic,
                 personalization_context=personalization_context
             )
+            body = {
+                "model": self.model_name,
+                "temperature": self.temperature,
+                "messages": [{"role": "user", "content": prompt}]
+            }
+            if self.response_format:
+                body["response_format"] = self.response_format
             
-            results.append(result)
-            
-            if result.success:
-                print(f"✅ Successfully generated lab for {concept['name']}")
-            else:
-                print(f"⚠️  Used fallback lab for {concept['name']}")
+            lines.append(json.dumps({
+                "custom_id": concept.name,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            }))
+        
+        client = self._get_client()
+        batch_file = client.files.create(
+            file=("lab_batch.jsonl", "\n".join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        print(f"📤 Submitted batch {batch.id} with {len(concepts)} concepts")
+        return batch.id
+    
+    def poll_batch(self, batch_id: str, concepts: List[ConceptInput],
+                   personalization_context: Optional[str] = None,
+                   poll_interval: float = 10.0,
+                   max_poll_interval: float = 300.0) -> List[CompleteLabResult]:
+        """
+        Wait for a batch submitted with submit_batch and parse its results.
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            concepts: The concepts passed to submit_batch
+            personalization_context: The personalization context passed to submit_batch
+            poll_interval: Initial delay between status checks in seconds
+            max_poll_interval: Upper bound for the exponential backoff
+        
+        Returns:
+            List of CompleteLabResult objects, in the same order as concepts.
+            Concepts without a usable response get a fallback lab.
+        """
+        client = self._get_client()
+        
+        # Poll with exponential backoff until the batch reaches a final state
+        batch = client.batches.retrieve(batch_id)
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+            batch = client.batches.retrieve(batch_id)
+        
+        if batch.status == "failed":
+            raise RuntimeError(f"Batch {batch_id} failed: {batch.errors}")
+        
+        # Expired or cancelled batches may still hold partial output
+        outputs = {}
+        if batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    outputs[record['custom_id']] = record
+        
+        results = []
+        for concept in concepts:
+            name = concept.name
+            try:
+                record = outputs.get(name)
+                if record is None:
+                    raise ValueError(f"No output in batch {batch_id} ({batch.status})")
+                if record.get('error'):
+                    raise ValueError(record['error'])
+                
+                response = record['response']
+                if response['status_code'] != 200:
+                    raise ValueError(f"Request failed with status {response['status_code']}")
+                
+                content = response['body']['choices'][0]['message']['content']
+                results.append(self._build_result(
+                    content, name, concept.definition, concept.topic, personalization_context
+                ))
+            except Exception as e:
+                results.append(self._error_result(e, name, concept.definition, concept.topic))
         
         return results
 
+
+@lru_cache(maxsize=8)
+def get_lab_service(model_name: str = "gpt-4", temperature: float = 0.7) -> LabGenerationService:
+    """
+    Get a shared LabGenerationService for a model and temperature.
+    
+    Reusing the service keeps its LLM client and connection pool warm instead
+    of rebuilding them for every caller.
+    
+    Args:
+        model_name: OpenAI model to use for generation
+        temperature: Temperature for generation (0.0-1.0)
+    
+    Returns:
+        Cached LabGenerationService instance
+    """
+    return LabGenerationService(model_name=model_name, temperature=temperature)
@@ -6,9 +6,11 @@ and creates a few sample labs for testing.
 """
 
 import json
+import logging
+from itertools import islice
 from pathlib import Path
 
-from services.lab_generation_service import LabGenerationService
+from services.lab_generation_service import get_lab_service
 from utils.file_utils import (
     load_concepts_from_export,
     organize_lab_output,
@@ -23,7 +25,7 @@ def test_single_concept():
     print("="*60)
     
     # Initialize service
-    lab_service = LabGenerationService(model_name="gpt-4", temperature=0.7)
+    lab_service = get_lab_service("gpt-4", 0.7)
     
     # Test concept
     concept_name = "NoSQL Database"
@@ -76,30 +78,27 @@ def test_batch_concepts():
         print(f"❌ Export file not found: {export_path}")
         return None
     
-    concepts = load_concepts_from_export(export_path)
+    # Test with first 3 concepts; islice stops parsing the export after them
+    test_concepts = list(islice(load_concepts_from_export(export_path), 3))
     
-    # Test with first 3 concepts
-    test_concepts = concepts[:3]
-    
-    print(f"\nLoaded {len(concepts)} total concepts")
-    print(f"Testing with first {len(test_concepts)} concepts:")
+    print(f"\nTesting with first {len(test_concepts)} concepts:")
     for i, c in enumerate(test_concepts, 1):
-        print(f"  {i}. {c['name']} (Topic: {c['topic']})")
+        print(f"  {i}. {c.name} (Topic: {c.topic})")
     
     # Initialize service
-    lab_service = LabGenerationService(model_name="gpt-4", temperature=0.7)
+    lab_service = get_lab_service("gpt-4", 0.7)
     
     # Generate labs
     results = []
     for i, concept in enumerate(test_concepts, 1):
         print(f"\n{'='*60}")
-        print(f"Generating lab {i}/{len(test_concepts)}: {concept['name']}")
+        print(f"Generating lab {i}/{len(test_concepts)}: {concept.name}")
         print(f"{'='*60}")
         
         result = lab_service.generate_lab(
-            concept_name=concept['name'],
-            concept_definition=concept['definition'],
-            topic=concept['topic'],
+            concept_name=concept.name,
+            concept_definition=concept.definition,
+            topic=concept.topic,
             personalization_context="sports"
         )
         
@@ -129,7 +128,7 @@ def test_save_output():
     print("="*60)
     
     # Generate a sample lab
-    lab_service = LabGenerationService(model_name="gpt-4", temperature=0.7)
+    lab_service = get_lab_service("gpt-4", 0.7)
     
     result = lab_service.generate_lab(
         concept_name="CAP Theorem",
@@ -236,5 +235,8 @@ def main():
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    # httpx logs every request at INFO; keep progress lines readable
+    logging.getLogger("httpx").setLevel(logging.WARNING)
     main()
 
@@ -0,0 +1,11 @@
+"""
+Shared pytest setup for the lab generation tests.
+"""
+
+import sys
+from pathlib import Path
+
+# The lab generator imports its packages (models, services, utils) as
+# top-level modules; put Lab_generate first so they win over the repo root's
+# own services package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,43 @@
+"""
+Tests for the lab output helpers in utils.file_utils.
+"""
+
+import shutil
+
+from generate_all_labs import TemplateLabGenerator
+from utils.file_utils import (
+    create_output_directory,
+    load_labs_jsonl,
+    organize_lab_output_jsonl
+)
+
+
+def test_jsonl_archive_round_trip(tmp_path):
+    generator = TemplateLabGenerator()
+    results = [
+        generator.generate_lab("Data Storage", "How data is persisted", "Storage"),
+        generator.generate_lab("Spark", "A distributed processing framework", "Processing",
+                               personalization_context="gaming", validate=False),
+    ]
+    archive = tmp_path / "labs" / "labs.jsonl"
+    
+    organize_lab_output_jsonl(results, archive)
+    organize_lab_output_jsonl(results[:1], archive)
+    records = list(load_labs_jsonl(archive))
+    
+    assert [r['concept'] for r in records] == ["Data Storage", "Spark", "Data Storage"]
+    assert records[0]['lab'] == results[0].lab.model_dump(mode='json')
+    assert records[1]['lab']['title'] == results[1].lab.title
+    assert records[1]['metadata']['personalization_applied'] is True
+    assert all(r['success'] for r in records)
+
+
+def test_output_directory_recreated_after_removal(tmp_path):
+    base = tmp_path / "out"
+    
+    first = create_output_directory(base, "Data Storage")
+    shutil.rmtree(base)
+    second = create_output_directory(base, "Data Storage")
+    
+    assert second == first
+    assert second.is_dir()
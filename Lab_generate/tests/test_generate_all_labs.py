@@ -0,0 +1,36 @@
+"""
+Tests for the template lab generator in generate_all_labs.
+"""
+
+import pytest
+
+import generate_all_labs
+from generate_all_labs import BASE_TIME, _SCHEMA_PROBE_DEFINITIONS, _difficulty_for
+
+
+def test_schema_probes_cover_every_difficulty():
+    probed = {
+        difficulty: _difficulty_for("Schema Check", definition)
+        for difficulty, definition in _SCHEMA_PROBE_DEFINITIONS.items()
+    }
+    
+    assert probed == {difficulty: difficulty for difficulty in BASE_TIME}
+
+
+def test_schema_probe_catches_invalid_challenge_template(monkeypatch):
+    exercise_specs = generate_all_labs._exercise_specs
+    
+    def drifted_specs(*args):
+        # Only medium and hard labs get the challenge exercise
+        return tuple(
+            spec._replace(hints=9) if spec.type == 'challenge' else spec
+            for spec in exercise_specs(*args)
+        )
+    
+    monkeypatch.setattr(generate_all_labs, "_exercise_specs", drifted_specs)
+    generate_all_labs._plan_lab.cache_clear()
+    try:
+        with pytest.raises(ValueError, match="hints"):
+            generate_all_labs._validate_template_schema()
+    finally:
+        generate_all_labs._plan_lab.cache_clear()
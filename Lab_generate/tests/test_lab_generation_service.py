@@ -0,0 +1,285 @@
+"""
+Tests for LabGenerationService, run against a fake streaming LLM.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services.config import get_openai_key
+from services.lab_generation_service import LabGenerationService
+from utils.file_utils import ConceptInput
+
+LAB_JSON = json.dumps({
+    "title": "Sharding Lab",
+    "topic": "Databases",
+    "difficulty": "medium",
+    "estimated_time": 45,
+    "sections": [{
+        "concept": "Sharding",
+        "title": "Splitting data",
+        "difficulty": "medium",
+        "scaffolding_level": "medium",
+        "exercises": [{"type": "guided", "hints": 2}]
+    }]
+})
+
+
+class FakeLLM:
+    """Streams a canned response in small chunks and counts calls and chunks."""
+
+    def __init__(self, content: str = LAB_JSON, chunk_size: int = 7):
+        self.content = content
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.chunks_sent = 0
+
+    def _chunks(self):
+        for i in range(0, len(self.content), self.chunk_size):
+            self.chunks_sent += 1
+            yield SimpleNamespace(content=self.content[i:i + self.chunk_size])
+
+    def stream(self, prompt):
+        self.calls += 1
+        yield from self._chunks()
+
+    async def astream(self, prompt):
+        self.calls += 1
+        for chunk in self._chunks():
+            yield chunk
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    get_openai_key.cache_clear()
+
+    def factory(content: str = LAB_JSON, **kwargs) -> LabGenerationService:
+        service = LabGenerationService(**kwargs)
+        service.llm = FakeLLM(content)
+        service.batch_http_clients = []
+
+        def make_llm(http_async_client=None):
+            service.batch_http_clients.append(http_async_client)
+            return service.llm
+
+        service._make_llm = make_llm
+        return service
+
+    yield factory
+    get_openai_key.cache_clear()
+
+
+def test_cache_hit_skips_llm(make_service, tmp_path):
+    service = make_service(temperature=0.0, cache_dir=tmp_path)
+
+    first = service.generate_lab("Sharding", "Splitting data", "Databases")
+    second = service.generate_lab("Sharding", "Splitting data", "Databases")
+
+    assert first.success and not first.metadata.cache_hit
+    assert second.success and second.metadata.cache_hit
+    assert second.lab == first.lab
+    assert service.llm.calls == 1
+
+
+def test_invalid_cache_entry_is_a_miss(make_service, tmp_path):
+    service = make_service(temperature=0.0, cache_dir=tmp_path)
+    prompt = service._create_lab_prompt("Sharding", "Splitting data", "Databases")
+    service._cache_path(prompt).write_text('{"title": 3}', encoding='utf-8')
+
+    result = service.generate_lab("Sharding", "Splitting data", "Databases")
+
+    assert result.success and not result.metadata.cache_hit
+    assert service.llm.calls == 1
+
+
+def test_cache_write_failure_keeps_generated_lab(make_service, tmp_path):
+    service = make_service(temperature=0.0, cache_dir=tmp_path / "cache")
+    service.cache_dir.rmdir()
+
+    result = service.generate_lab("Sharding", "Splitting data", "Databases")
+
+    assert result.success
+    assert result.lab.title == "Sharding Lab"
+
+
+def test_long_preamble_before_fence_is_parsed(make_service):
+    preamble = "Here is a hands-on lab exercise tailored to the concept. " * 5
+    service = make_service(f"{preamble}\n```json\n{LAB_JSON}\n```")
+
+    result = service.generate_lab("Sharding", "Splitting data", "Databases")
+    async_result = asyncio.run(
+        service.agenerate_lab("Sharding", "Splitting data", "Databases")
+    )
+
+    assert len(preamble) > 100
+    assert result.success and result.lab.title == "Sharding Lab"
+    assert async_result.success and async_result.lab.title == "Sharding Lab"
+
+
+def test_prose_response_aborts_early(make_service):
+    service = make_service("I cannot help with that request. " * 200)
+
+    result = service.generate_lab("Sharding", "Splitting data", "Databases")
+
+    assert not result.success
+    assert "does not look like JSON" in result.error
+    assert service.llm.chunks_sent * service.llm.chunk_size < 1000
+
+
+def test_short_refusal_is_rejected(make_service):
+    service = make_service("Sorry, I can't help with that.")
+
+    result = service.generate_lab("Sharding", "Splitting data", "Databases")
+    async_result = asyncio.run(
+        service.agenerate_lab("Sharding", "Splitting data", "Databases")
+    )
+
+    assert "does not look like JSON" in result.error
+    assert "does not look like JSON" in async_result.error
+
+
+class TrackingLLM(FakeLLM):
+    """FakeLLM that records the highest number of concurrent streams."""
+
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+
+    async def astream(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            async for chunk in super().astream(prompt):
+                yield chunk
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 10])
+def test_batch_concurrency_is_capped_across_bins(make_service, max_concurrency):
+    service = make_service()
+    service.llm = TrackingLLM()
+    definitions = ["short", "m" * 150, "A distributed consensus protocol"]
+    concepts = [
+        ConceptInput(name=f"Concept {i}", definition=definitions[i % 3], topic="Databases")
+        for i in range(60)
+    ]
+
+    results = service.generate_batch_labs(concepts, max_concurrency=max_concurrency)
+
+    assert [r.metadata.concept_name for r in results] == [c.name for c in concepts]
+    assert all(r.success for r in results)
+    assert service.llm.peak <= max_concurrency
+
+
+def test_each_batch_gets_its_own_async_http_client(make_service):
+    service = make_service()
+    concepts = [ConceptInput(name="Sharding", definition="Splitting data", topic="Databases")]
+
+    service.generate_batch_labs(concepts)
+    service.generate_batch_labs(concepts)
+
+    first, second = service.batch_http_clients
+    assert first is not second
+    assert first.is_closed and second.is_closed
+
+
+class StubBatchClient:
+    """Stands in for the OpenAI client's files and batches endpoints."""
+
+    def __init__(self, statuses, output_lines=(), errors=None):
+        self.statuses = list(statuses)
+        self.output_text = "\n".join(json.dumps(line) for line in output_lines)
+        self.errors = errors
+        self.uploaded = None
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    def _create_file(self, file, purpose):
+        self.uploaded = file[1].decode('utf-8')
+        return SimpleNamespace(id="file-in")
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch-1")
+
+    def _retrieve(self, batch_id):
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        output_file_id = "file-out" if self.output_text else None
+        return SimpleNamespace(status=status, output_file_id=output_file_id, errors=self.errors)
+
+    def _content(self, file_id):
+        return SimpleNamespace(text=self.output_text)
+
+
+def _batch_line(custom_id, content=LAB_JSON, status_code=200, error=None):
+    body = {"choices": [{"message": {"content": content}}]}
+    return {
+        "custom_id": custom_id,
+        "response": {"status_code": status_code, "body": body},
+        "error": error
+    }
+
+
+def _batch_concepts(*names):
+    return [ConceptInput(name=name, definition="Splitting data", topic="Databases")
+            for name in names]
+
+
+def test_batch_api_results_follow_input_order(make_service):
+    service = make_service()
+    concepts = _batch_concepts("A", "B", "C")
+    service._client = StubBatchClient(
+        ["validating", "in_progress", "completed"],
+        [_batch_line("C"), _batch_line("A"), _batch_line("B")]
+    )
+
+    batch_id = service.submit_batch(concepts)
+    results = service.poll_batch(batch_id, concepts, poll_interval=0)
+
+    uploaded = [json.loads(line) for line in service._client.uploaded.splitlines()]
+    assert [line["custom_id"] for line in uploaded] == ["A", "B", "C"]
+    assert [r.metadata.concept_name for r in results] == ["A", "B", "C"]
+    assert all(r.success for r in results)
+
+
+def test_batch_api_failed_records_get_fallback_labs(make_service):
+    service = make_service()
+    concepts = _batch_concepts("A", "B", "C", "D")
+    service._client = StubBatchClient(
+        ["expired"],
+        [
+            _batch_line("A"),
+            _batch_line("B", status_code=429),
+            _batch_line("C", error={"code": "server_error"})
+        ]
+    )
+
+    results = service.poll_batch("batch-1", concepts, poll_interval=0)
+
+    assert [r.success for r in results] == [True, False, False, False]
+    assert "status 429" in results[1].error
+    assert "server_error" in results[2].error
+    assert "No output" in results[3].error
+    assert all(r.lab.sections for r in results)
+
+
+def test_batch_api_rejects_duplicate_names(make_service):
+    service = make_service()
+    service._client = StubBatchClient(["completed"])
+
+    with pytest.raises(ValueError, match="unique"):
+        service.submit_batch(_batch_concepts("A", "B", "A"))
+    assert service._client.uploaded is None
+
+
+def test_batch_api_failed_batch_raises(make_service):
+    service = make_service()
+    service._client = StubBatchClient(["in_progress", "failed"], errors="bad input file")
+
+    with pytest.raises(RuntimeError, match="bad input file"):
+        service.poll_batch("batch-1", _batch_concepts("A"), poll_interval=0)
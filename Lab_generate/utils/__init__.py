@@ -3,20 +3,34 @@ Utility functions package for lab generation.
 """
 
 from .file_utils import (
+    ConceptInput,
     sanitize_filename,
     create_output_directory,
     save_lab_json,
     load_concepts_from_export,
     organize_lab_output,
-    create_summary_report
+    write_lab_line,
+    organize_lab_output_jsonl,
+    load_labs_jsonl,
+    summarize_lab_result,
+    write_summary_line,
+    create_summary_report,
+    create_summary_report_from_jsonl
 )
 
 __all__ = [
+    'ConceptInput',
     'sanitize_filename',
     'create_output_directory',
     'save_lab_json',
     'load_concepts_from_export',
     'organize_lab_output',
-    'create_summary_report'
+    'write_lab_line',
+    'organize_lab_output_jsonl',
+    'load_labs_jsonl',
+    'summarize_lab_result',
+    'write_summary_line',
+    'create_summary_report',
+    'create_summary_report_from_jsonl'
 ]
 
@@ -2,12 +2,78 @@
 Utility functions for file operations in lab generation.
 """
 
+import dataclasses
 import json
 import re
+import string
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, Optional, Union
 
+from models.lab_models_fast import _DATACLASS_OPTIONS
 
+# ijson lets large exports be parsed incrementally; fall back to json otherwise
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+# orjson is a much faster drop-in for (de)serializing labs and exports
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Patterns used by sanitize_filename
+_INVALID_CHARS = re.compile(r'[^\w\-_.]')
+_MULTI_UNDERSCORE = re.compile(r'_+')
+
+# ASCII part of sanitize_filename in a single translate pass: spaces become
+# underscores and every ASCII character _INVALID_CHARS would remove is deleted
+_ASCII_KEEP = set(string.ascii_letters + string.digits + '-_.')
+_SANITIZE_TABLE = {
+    code: None for code in range(128) if chr(code) not in _ASCII_KEEP
+}
+_SANITIZE_TABLE[ord(' ')] = '_'
+
+
+@dataclasses.dataclass(**_DATACLASS_OPTIONS)
+class ConceptInput:
+    """A concept read from the knowledge graph export."""
+
+    name: str
+    definition: str
+    topic: str
+    text_evidence: str = ""
+
+
+def _dump_json_bytes(data: Any) -> bytes:
+    """Serialize data as indented UTF-8 JSON."""
+    if ORJSON_AVAILABLE:
+        # OPT_NON_STR_KEYS stringifies int keys the way the json module does
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _dump_json_line(data: Any) -> bytes:
+    """Serialize data as one compact UTF-8 JSON line, including the newline."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8') + b"\n"
+
+
+def _model_to_dict(model) -> Dict[str, Any]:
+    """Dump a Pydantic model or a models.lab_models_fast dataclass to plain data."""
+    if dataclasses.is_dataclass(model):
+        return dataclasses.asdict(model)
+    return model.model_dump(mode='json')
+
+
+@lru_cache(maxsize=512)
 def sanitize_filename(name: str, max_length: int = 100) -> str:
     """
     Sanitize a string to be used as a filename.
@@ -19,14 +85,15 @@ def sanitize_filename(name: str, max_length: int = 100) -> str:
     Returns:
         Sanitized filename
     """
-    # Replace spaces with underscores
-    sanitized = name.replace(' ', '_')
+    # Replace spaces with underscores and drop invalid ASCII characters
+    sanitized = name.translate(_SANITIZE_TABLE)
     
-    # Remove or replace invalid characters
-    sanitized = re.sub(r'[^\w\-_.]', '', sanitized)
+    # Only non-ASCII names still need the Unicode-aware pattern
+    if not sanitized.isascii():
+        sanitized = _INVALID_CHARS.sub('', sanitized)
     
     # Remove multiple consecutive underscores
-    sanitized = re.sub(r'_+', '_', sanitized)
+    sanitized = _MULTI_UNDERSCORE.sub('_', sanitized)
     
     # Trim to max length
     if len(sanitized) > max_length:
@@ -38,7 +105,7 @@ def sanitize_filename(name: str, max_length: int = 100) -> str:
     return sanitized
 
 
-def create_output_directory(base_dir: str, concept_name: str) -> Path:
+def create_output_directory(base_dir: Union[str, Path], concept_name: str) -> Path:
     """
     Create output directory for a concept's lab.
     
@@ -53,7 +120,9 @@ def create_output_directory(base_dir: str, concept_name: str) -> Path:
     sanitized_name = sanitize_filename(concept_name)
     
     # Create directory path
-    output_dir = Path(base_dir) / sanitized_name
+    if not isinstance(base_dir, Path):
+        base_dir = Path(base_dir)
+    output_dir = base_dir / sanitized_name
     
     # Create directory if it doesn't exist
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -75,48 +144,55 @@ def save_lab_json(lab_data: Dict[str, Any], output_path: Path, filename: str = "
     """
     file_path = output_path / filename
     
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(lab_data, f, indent=2, ensure_ascii=False)
+    # Serialize in memory first so the file is written with a single call
+    file_path.write_bytes(_dump_json_bytes(lab_data))
     
     return file_path
 
 
-def load_concepts_from_export(export_path: str) -> list:
+def _iter_theories(export_path: str) -> Iterator[Dict[str, Any]]:
+    """Yield theory objects from the export, streaming them when ijson is available."""
+    if IJSON_AVAILABLE:
+        with open(export_path, 'rb') as f:
+            yield from ijson.items(f, 'theories.item')
+    else:
+        raw = Path(export_path).read_bytes()
+        data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+        yield from data.get('theories', [])
+
+
+def load_concepts_from_export(export_path: str) -> Iterator[ConceptInput]:
     """
     Load all concepts from the Neo4j export file.
     
+    Concepts are yielded one at a time so the whole export never has to be
+    held in memory; wrap the call in list() when a total count is needed.
+    
     Args:
         export_path: Path to the complete_neo4j_export_no_embeddings.json file
     
-    Returns:
-        List of concept dictionaries with 'name', 'definition', and 'topic'
+    Yields:
+        ConceptInput with the concept's name, definition, topic and text evidence
     """
-    with open(export_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    concepts = []
-    
     # Extract concepts from theories
-    for theory in data.get('theories', []):
+    for theory in _iter_theories(export_path):
         topic = theory.get('topic', 'Unknown')
         
         for concept in theory.get('concepts', []):
-            concepts.append({
-                'name': concept.get('name', ''),
-                'definition': concept.get('definition', ''),
-                'topic': topic,
-                'text_evidence': concept.get('text_evidence', '')
-            })
-    
-    return concepts
+            yield ConceptInput(
+                name=concept.get('name', ''),
+                definition=concept.get('definition', ''),
+                topic=topic,
+                text_evidence=concept.get('text_evidence', '')
+            )
 
 
-def organize_lab_output(lab_result, output_dir: str, concept_name: str) -> Dict[str, str]:
+def organize_lab_output(lab_result, output_dir: Union[str, Path], concept_name: str) -> Dict[str, str]:
     """
     Organize and save lab output in a structured format.
     
     Args:
-        lab_result: CompleteLabResult object
+        lab_result: CompleteLabResult or FastCompleteLabResult object
         output_dir: Base output directory
         concept_name: Name of the concept
     
@@ -126,21 +202,24 @@ def organize_lab_output(lab_result, output_dir: str, concept_name: str) -> Dict[
     # Create concept-specific directory
     concept_dir = create_output_directory(output_dir, concept_name)
     
+    # Dump the lab once; both output files are built from the same dict
+    lab_dump = _model_to_dict(lab_result.lab)
+    
     # Prepare lab data for JSON export
     lab_data = {
-        'lab': lab_result.lab.model_dump(),
-        'metadata': lab_result.metadata.model_dump(),
+        'lab': lab_dump,
+        'metadata': _model_to_dict(lab_result.metadata),
         'success': lab_result.success
     }
     
     if lab_result.error:
         lab_data['error'] = lab_result.error
     
-    # Save lab JSON
-    lab_file = save_lab_json(lab_data, concept_dir, f"{sanitize_filename(concept_name)}_lab.json")
+    # Simplified version (just the lab content)
+    simplified_data = lab_dump
     
-    # Save simplified version (just the lab content)
-    simplified_data = lab_result.lab.model_dump()
+    # Save both files once all payloads are built
+    lab_file = save_lab_json(lab_data, concept_dir, f"{sanitize_filename(concept_name)}_lab.json")
     simplified_file = save_lab_json(simplified_data, concept_dir, "lab_content.json")
     
     return {
@@ -150,44 +229,163 @@ def organize_lab_output(lab_result, output_dir: str, concept_name: str) -> Dict[
     }
 
 
-def create_summary_report(results: list, output_dir: str) -> Path:
+def write_lab_line(lab_file, lab_result) -> None:
     """
-    Create a summary report of all generated labs.
+    Append a lab's full record to an open JSONL archive.
+    
+    The record matches the full lab file written by organize_lab_output, plus
+    the concept name.
     
     Args:
-        results: List of CompleteLabResult objects
-        output_dir: Output directory for the report
+        lab_file: File object opened in binary write/append mode
+        lab_result: CompleteLabResult or FastCompleteLabResult object
+    """
+    record = {
+        'concept': lab_result.metadata.concept_name,
+        'lab': _model_to_dict(lab_result.lab),
+        'metadata': _model_to_dict(lab_result.metadata),
+        'success': lab_result.success
+    }
+    
+    if lab_result.error:
+        record['error'] = lab_result.error
+    
+    lab_file.write(_dump_json_line(record))
+
+
+def organize_lab_output_jsonl(results: Iterable, output_path: Union[str, Path]) -> Path:
+    """
+    Append labs to a single JSONL archive instead of per-concept directories.
+    
+    Each line is written with write_lab_line. Suited to bulk exports where
+    thousands of small files and directories would dominate the I/O.
+    
+    Args:
+        results: Iterable of CompleteLabResult or FastCompleteLabResult objects
+        output_path: Path of the JSONL archive; appended to if it exists
     
     Returns:
-        Path to the summary report file
+        Path to the JSONL archive
     """
-    summary = {
-        'total_labs': len(results),
-        'successful': sum(1 for r in results if r.success),
-        'failed': sum(1 for r in results if not r.success),
-        'labs': []
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(output_path, 'ab') as f:
+        for result in results:
+            write_lab_line(f, result)
+    
+    return output_path
+
+
+def load_labs_jsonl(archive_path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Read lab records written by write_lab_line one at a time.
+    
+    Args:
+        archive_path: Path to the JSONL archive
+    
+    Yields:
+        Dictionary per lab with 'concept', 'lab', 'metadata' and 'success'
+    """
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    with open(archive_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def summarize_lab_result(result) -> Dict[str, Any]:
+    """
+    Extract the summary report entry for a single lab.
+    
+    Args:
+        result: CompleteLabResult object
+    
+    Returns:
+        Dictionary with the lab's summary fields
+    """
+    lab_info = {
+        'concept': result.metadata.concept_name,
+        'topic': result.metadata.source_topic,
+        'title': result.lab.title,
+        'difficulty': result.lab.difficulty,
+        'estimated_time': result.lab.estimated_time,
+        'num_sections': len(result.lab.sections),
+        'success': result.success
     }
     
-    for result in results:
-        lab_info = {
-            'concept': result.metadata.concept_name,
-            'topic': result.metadata.source_topic,
-            'title': result.lab.title,
-            'difficulty': result.lab.difficulty,
-            'estimated_time': result.lab.estimated_time,
-            'num_sections': len(result.lab.sections),
-            'success': result.success
-        }
-        
-        if result.error:
-            lab_info['error'] = result.error
-        
-        summary['labs'].append(lab_info)
+    if result.error:
+        lab_info['error'] = result.error
+    
+    return lab_info
+
+
+def _as_summary_entry(result) -> Dict[str, Any]:
+    """Return the summary entry for a CompleteLabResult or an existing entry."""
+    return result if isinstance(result, dict) else summarize_lab_result(result)
+
+
+def write_summary_line(summary_file, result) -> None:
+    """
+    Append a lab's summary entry to an open JSONL file.
+    
+    Args:
+        summary_file: File object opened in binary write/append mode
+        result: CompleteLabResult object or entry from summarize_lab_result
+    """
+    summary_file.write(_dump_json_line(_as_summary_entry(result)))
+
+
+def _write_summary(labs: list, output_dir: Union[str, Path]) -> Path:
+    """Write generation_summary.json for a list of summary entries."""
+    # Count successes in a single pass; failures are the remainder
+    successful = 0
+    for lab in labs:
+        if lab['success']:
+            successful += 1
+    
+    summary = {
+        'total_labs': len(labs),
+        'successful': successful,
+        'failed': len(labs) - successful,
+        'labs': labs
+    }
     
     # Save summary
     summary_path = Path(output_dir) / 'generation_summary.json'
-    with open(summary_path, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    summary_path.write_bytes(_dump_json_bytes(summary))
     
     return summary_path
 
+
+def create_summary_report(results: list, output_dir: Union[str, Path]) -> Path:
+    """
+    Create a summary report of all generated labs.
+    
+    Args:
+        results: List of CompleteLabResult objects or entries from
+            summarize_lab_result
+        output_dir: Output directory for the report
+    
+    Returns:
+        Path to the summary report file
+    """
+    return _write_summary([_as_summary_entry(r) for r in results], output_dir)
+
+
+def create_summary_report_from_jsonl(summary_jsonl: Path, output_dir: Union[str, Path]) -> Path:
+    """
+    Create the summary report from entries streamed with write_summary_line.
+    
+    Args:
+        summary_jsonl: Path to the JSONL file of summary entries
+        output_dir: Output directory for the report
+    
+    Returns:
+        Path to the summary report file
+    """
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    with open(summary_jsonl, 'rb') as f:
+        labs = [loads(line) for line in f if line.strip()]
+    
+    return _write_summary(labs, output_dir)